@@ -1,15 +1,16 @@
 """
 包入口文件，通常不用修改
+界面相关的模块在 run_app 中才导入，命令行程序（比如 python -m app.cluster）导入 app 包时不需要 PySide2
 """
 import sys
-from PySide2 import QtWidgets, QtCore, QtGui
-from app.main_window import MainWindow
-from app.bases.config import Config, ICON_PATH
-
-QtCore.QCoreApplication.setAttribute(QtCore.Qt.ApplicationAttribute.AA_EnableHighDpiScaling)
 
 
 def run_app():
+    from PySide2 import QtWidgets, QtCore, QtGui
+    from app.main_window import MainWindow
+    from app.bases.config import Config, ICON_PATH
+
+    QtCore.QCoreApplication.setAttribute(QtCore.Qt.ApplicationAttribute.AA_EnableHighDpiScaling)
     Config.read_json()
     # 暗色模式设置 darkmode对应值不同区别
     # 0: 禁用暗色模式（默认）
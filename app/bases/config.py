@@ -41,16 +41,30 @@ HTML_BOTTOM_HINT = f"""
 """
 REAL_BOTTOM_HINT = BOTTOM_HINT if not BOTTOM_HINT_LINK else HTML_BOTTOM_HINT
 
-# 校验过程 5 个状态对应的显示名和文字颜色
+# 校验过程 6 个状态对应的显示名和文字颜色
 STATE_STYLES = {
     -2: Cell('程序异常', 'red'),
     -1: Cell('校验失败', 'red'),
     0: Cell('未校验', 'black'),
     1: Cell('校验成功', '#008000'),
     2: Cell('校验中', 'orange'),
+    4: Cell('安装完成', '#008000'),
 }
 DEFAULT_CELL = Cell('未知状态', 'blue')
 
+# 后台校验模式下，所有校验线程合计的读取速度上限（MB/s）
+BACKGROUND_RATE = 20
+
+# 监视模式下，文件最后一次变化后等待多久再重新校验（毫秒），避免下载/复制过程中反复校验
+WATCH_DEBOUNCE = 2000
+
+# 跟随模式下，文件大小和修改时间都停止变化多久后视为下载完成并给出校验结果（毫秒）
+FOLLOW_SETTLE = 3000
+
+# 跟随模式下，所有文件都停止增长（没有文件在下载）多久后（毫秒），仍未出现的文件按文件缺失处理
+# 逐个下载多个压缩包时，只要还有文件在下载，尚未开始下载的文件就会一直等待
+FOLLOW_MISSING_TIMEOUT = 60000
+
 
 class Config:
     _path = Path(resource_path('./assets/presets.json'))
@@ -66,4 +80,6 @@ class Config:
 
         raw_presets = data.get('presets')
         if raw_presets:
-            cls.presets = [Preset(preset['filename'], preset['data_md5']) for preset in raw_presets]
+            cls.presets = [
+                Preset(preset['filename'], preset['data_md5'], preset.get('data_size')) for preset in raw_presets
+            ]
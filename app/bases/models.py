@@ -1,16 +1,16 @@
 """
-包含诸多模型类
+包含诸多模型类（不依赖 Qt，分布式校验等命令行程序也会使用）
 通常客户无需修改
 """
-from PySide2 import QtCore
 from pathlib import Path
 from .utils import calculate_md5
 
 
 class Preset:
-    def __init__(self, filename: str, data_md5: str):
+    def __init__(self, filename: str, data_md5: str, data_size: int = None):
         self.filename = filename
         self.data_md5 = data_md5
+        self.data_size = data_size  # 文件大小（可选），跟随模式下用于判断下载是否完成
 
     def __eq__(self, other):
         if issubclass(other.__class__, Preset):
@@ -18,10 +18,13 @@ class Preset:
         return False
 
     def to_dict(self):
-        return {
+        data = {
             'filename': self.filename,
             'data_md5': self.data_md5
         }
+        if self.data_size is not None:
+            data['data_size'] = self.data_size
+        return data
 
     @classmethod
     def from_filename(cls, filename: str):
@@ -32,7 +35,7 @@ class Preset:
             return None
 
         data_md5 = calculate_md5(filepath)
-        obj = cls(filepath.name, data_md5)
+        obj = cls(filepath.name, data_md5, filepath.stat().st_size)
         return obj
 
 
@@ -40,63 +43,3 @@ class Cell:
     def __init__(self, display_name: str, foreground_color: str):
         self.display_name = display_name
         self.foreground_color = foreground_color
-
-
-class TableModel(QtCore.QAbstractTableModel):
-    def __init__(self):
-        super().__init__()
-        self.proxies = []
-        self.headers = []
-
-    def getCheckedData(self):
-        return (p for p in self.proxies if p.is_checked)
-
-    def checkedCount(self):
-        return len([p for p in self.proxies if p.is_checked])
-
-    def rowCount(self, parent=QtCore.QModelIndex()):
-        return len(self.proxies)
-
-    def columnCount(self, parent=QtCore.QModelIndex()):
-        return len(self.headers)
-
-    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
-        if not index.isValid():
-            return None
-
-    def setData(self, index, value, role=QtCore.Qt.ItemDataRole.EditRole):
-        if not index.isValid():
-            return False
-
-        row = index.row()
-        col = index.column()
-
-        proxy = self.proxies[row]
-
-        if role == QtCore.Qt.ItemDataRole.CheckStateRole and col == 0:
-            proxy.is_checked = (value == QtCore.Qt.CheckState.Checked)
-            self.dataChanged.emit(index, index)
-            return True
-
-        return False
-
-    def flags(self, index):
-        if not index.isValid():
-            return QtCore.Qt.ItemFlag.NoItemFlags
-
-        flags = QtCore.Qt.ItemFlag.ItemIsEnabled
-
-        return flags
-
-    def headerData(self, section, orientation, role=QtCore.Qt.ItemDataRole.DisplayRole):
-        if role == QtCore.Qt.ItemDataRole.DisplayRole:
-            if orientation == QtCore.Qt.Orientation.Horizontal:
-                if 0 <= section < len(self.headers):
-                    return self.headers[section]
-            elif orientation == QtCore.Qt.Orientation.Vertical:
-                return str(section + 1)
-
-        return None
-
-    def updateData(self):
-        pass
@@ -4,17 +4,293 @@
 """
 import os
 import sys
+import time
+import ctypes
 import hashlib
+import platform
+import threading
+from pathlib import Path
 
+# 自适应块大小的上下限（32kb~8mb）
+MIN_CHUNK_SIZE = 32 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+# 未校准（或文件太小无法校准）时使用的默认块大小
+DEFAULT_CHUNK_SIZE = 256 * 1024
+# 校准时依次测量的块大小，以及每个块大小测量时最多读取的字节数
+CALIBRATE_CANDIDATES = (64 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024)
+CALIBRATE_BYTES = 8 * 1024 * 1024
+# 小于该大小的文件测量误差太大，不用于校准
+CALIBRATE_MIN_SIZE = 4 * 1024 * 1024
+# 单次读取耗时超过上限则缩小块，低于下限则向校准值恢复（单位：秒）
+LATENCY_HIGH = 0.2
+LATENCY_LOW = 0.02
 
-def calculate_md5(filepath, chunk_size=8192):
+
+class ChunkSizer:
+    """
+    自适应的读取块大小
+    启动时每个设备（st_dev）在其最大的文件上测量若干块大小下的读取速度（MB/s），取最快者缓存下来
+    （缓存只在当前进程内有效）；启动时未覆盖到的设备在第一次读取足够大的文件时校准；
+    读取过程中根据单次读取耗时进行调整：磁盘繁忙时缩小块，空闲时恢复到校准值
+    """
+    _calibrated = {}  # 设备号 -> 校准后的块大小
+    _calibrate_lock = threading.Lock()
+
+    def __init__(self, filepath):
+        self.baseline = self.calibrate(filepath)  # 该设备的校准值
+        self.chunk_size = self.baseline  # 当前使用的块大小
+
+    @classmethod
+    def calibrate_paths(cls, filepaths):
+        """启动时调用：按设备分组，每个尚未校准的设备在其最大的文件上测量一次"""
+        largest = {}  # 设备号 -> (文件大小, 文件路径)
+        for filepath in filepaths:
+            try:
+                stat = os.stat(filepath)
+            except OSError:
+                continue
+            if stat.st_dev not in cls._calibrated and stat.st_size > largest.get(stat.st_dev, (0, None))[0]:
+                largest[stat.st_dev] = (stat.st_size, filepath)
+        for device, (size, filepath) in largest.items():
+            cls._calibrate_device(device, filepath, size)
+
+    @classmethod
+    def calibrate(cls, filepath):
+        """获取文件所在设备的校准块大小，设备尚未校准时在该文件上测量一次"""
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return DEFAULT_CHUNK_SIZE
+        if stat.st_dev not in cls._calibrated:
+            cls._calibrate_device(stat.st_dev, filepath, stat.st_size)
+        return cls._calibrated.get(stat.st_dev, DEFAULT_CHUNK_SIZE)
+
+    @classmethod
+    def _calibrate_device(cls, device, filepath, size):
+        if size < CALIBRATE_MIN_SIZE:
+            return None
+        with cls._calibrate_lock:
+            # 等锁期间可能已有其他线程完成了同一设备的校准
+            if device in cls._calibrated:
+                return None
+            try:
+                cls._calibrated[device] = cls._measure(filepath, size)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _measure(filepath, size):
+        """在文件上测量各候选块大小的读取速度，返回最快的块大小"""
+        # 测量区间均匀分布在整个文件中，文件较小时只测量不超过区间大小的候选值
+        region = size // len(CALIBRATE_CANDIDATES)
+        budget = min(CALIBRATE_BYTES, region)
+        candidates = [c for c in CALIBRATE_CANDIDATES if c <= budget]
+        best_size, best_speed = DEFAULT_CHUNK_SIZE, 0.0
+        with open(filepath, 'rb') as f:
+            for index, chunk_size in enumerate(candidates):
+                offset = index * region
+                if hasattr(os, 'posix_fadvise'):
+                    # 测量前丢弃该区间的页缓存（包括上一个区间预读进来的部分），测的是磁盘而不是内存
+                    os.posix_fadvise(f.fileno(), offset, budget, os.POSIX_FADV_DONTNEED)
+                f.seek(offset)
+                read_size = 0
+                start = time.perf_counter()
+                while read_size < budget:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        break
+                    read_size += len(chunk)
+                elapsed = max(time.perf_counter() - start, 1e-9)
+                speed = read_size / elapsed / (1024 * 1024)
+                if speed > best_speed:
+                    best_size, best_speed = chunk_size, speed
+        return min(max(best_size, MIN_CHUNK_SIZE), MAX_CHUNK_SIZE)
+
+    def observe(self, elapsed):
+        """根据单次读取耗时调整块大小，返回调整后的块大小"""
+        if elapsed > LATENCY_HIGH and self.chunk_size > MIN_CHUNK_SIZE:
+            self.chunk_size = max(self.chunk_size // 2, MIN_CHUNK_SIZE)
+        elif elapsed < LATENCY_LOW and self.chunk_size < self.baseline:
+            self.chunk_size = min(self.chunk_size * 2, self.baseline, MAX_CHUNK_SIZE)
+        return self.chunk_size
+
+
+# 后台模式下线程的 nice 值（CPU 优先级，19 最低）
+BACKGROUND_NICE = 19
+# Linux ioprio_set 参数：IDLE 类只在磁盘空闲时才会得到调度，恢复时使用 BE 类并显式指定等级
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_CLASS_BE = 2
+IOPRIO_CLASS_IDLE = 3
+# 各架构下的系统调用号 (ioprio_set, gettid)
+SYSCALL_NUMBERS = {
+    'x86_64': (251, 186),
+    'i386': (289, 224),
+    'i686': (289, 224),
+    'aarch64': (30, 178),
+    'armv7l': (314, 224),
+}
+
+
+class TokenBucket:
+    """
+    令牌桶限速器，由所有校验线程共享
+    每次读取前按读取的字节数取令牌，不足时等待；rate 为每秒补充的字节数
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.capacity = rate  # 最多允许 1 秒的突发读取
+        self.tokens = rate
+        self.last_time = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, size, should_wait=lambda: True):
+        """取出 size 个令牌，不足时休眠；should_wait 返回 False 时立即结束等待（比如切回快速模式或停止）"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_time) * self.rate)
+            self.last_time = now
+            # 允许透支，后来者需要等待透支部分补齐
+            self.tokens -= size
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        deadline = time.monotonic() + wait
+        while should_wait():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(remaining, 0.1))
+
+
+def _syscall(number, *args):
+    libc = ctypes.CDLL(None, use_errno=True)
+    result = libc.syscall(number, *args)
+    if result < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+    return result
+
+
+def native_thread_id():
+    """当前线程的系统线程号（Linux 下 nice、ioprio 以此为单位）"""
+    if hasattr(threading, 'get_native_id'):
+        return threading.get_native_id()
+    return _syscall(SYSCALL_NUMBERS[platform.machine()][1])
+
+
+_thread_priority = threading.local()
+
+
+def can_restore_nice(nice):
+    """调高 nice 后能否再恢复到 nice：非特权用户受 RLIMIT_NICE 限制，通常无法恢复"""
+    if os.geteuid() == 0:
+        return True
+    import resource
+    soft, _ = resource.getrlimit(resource.RLIMIT_NICE)
+    return soft == resource.RLIM_INFINITY or 20 - nice <= soft
+
+
+def set_thread_background(enabled):
+    """
+    将当前线程切换为后台（空闲 IO 优先级 + 最低 CPU 优先级）或恢复为普通优先级
+    仅在 Linux 下生效；CPU 优先级只在之后能够恢复时才会降低，避免线程池复用的线程一直停留在低优先级
+    返回当前线程是否已处于目标状态（降低优先级失败不影响校验，视为成功；恢复失败返回 False）
+    """
+    if not sys.platform.startswith('linux') or platform.machine() not in SYSCALL_NUMBERS:
+        return True
+    success = True
+    tid = native_thread_id()
+    # 降低前记录线程原本的 nice 值，恢复时使用
+    if not hasattr(_thread_priority, 'nice'):
+        _thread_priority.nice = os.getpriority(os.PRIO_PROCESS, tid)
+    base_nice = _thread_priority.nice
+    if enabled:
+        ioprio = IOPRIO_CLASS_IDLE << IOPRIO_CLASS_SHIFT
+    else:
+        # 与内核按 nice 推算的默认等级一致：nice 0 对应 BE 等级 4
+        ioprio = (IOPRIO_CLASS_BE << IOPRIO_CLASS_SHIFT) | max(0, min(7, (base_nice + 20) // 5))
+    try:
+        _syscall(SYSCALL_NUMBERS[platform.machine()][0], IOPRIO_WHO_PROCESS, tid, ioprio)
+    except OSError:
+        success = False
+    if can_restore_nice(base_nice):
+        try:
+            os.setpriority(os.PRIO_PROCESS, tid, BACKGROUND_NICE if enabled else base_nice)
+        except OSError:
+            success = False
+    return success or enabled
+
+
+class Throttle:
+    """
+    快速/后台两种校验模式的切换，由线程池持有并分发给所有校验任务
+    快速模式：不限速；后台模式：共享令牌桶限速，且降低线程的 IO/CPU 优先级
+    """
+
+    def __init__(self, rate):
+        self.background = False  # 运行过程中可随时切换
+        self.bucket = TokenBucket(rate)
+        self._local = threading.local()  # 记录每个线程当前生效的模式
+
+    def acquire(self, size, is_running=lambda: True):
+        """
+        每次读取到 size 个字节后调用（按实际读取的字节数计费，读到末尾的空读取、等待期间不调用），
+        按当前模式调整线程优先级并限速：令牌桶允许透支，读取之后再等待同样能把平均速度限制在 rate 以内
+        """
+        background = self.background
+        if getattr(self._local, 'background', False) != background:
+            # 恢复失败时保留原状态，下次读取时重试
+            if set_thread_background(background):
+                self._local.background = background
+        if background:
+            self.bucket.consume(size, lambda: self.background and is_running())
+
+
+def calculate_md5(filepath, chunk_size=None):
     md5 = hashlib.md5()
+    chunk_size = chunk_size or ChunkSizer.calibrate(filepath)
     with filepath.open('rb') as f:
         for chunk in iter(lambda: f.read(chunk_size), b''):
             md5.update(chunk)
     return md5.hexdigest()
 
 
+def verify_md5(filepath, data_md5, throttle=None, is_running=lambda: True, on_progress=None):
+    """
+    校验单个文件，返回 (state, md5)，state 与 MD5Worker 的含义相同，界面和分布式工作进程共用
+    块大小按设备校准并动态调整；throttle 为 Throttle 限速器（可选）；
+    is_running 返回 False 时停止读取，返回 (0, 未校验)；on_progress(progress) 在每次读取后调用
+    文件缺失返回 (-1, 缺失)，其他异常直接抛出，由调用方处理
+    """
+    filepath = Path(filepath)
+    if not filepath.exists():
+        return -1, '文件缺失，无法计算'
+    md5 = hashlib.md5()
+    total_size = filepath.stat().st_size
+    sizer = ChunkSizer(filepath)
+    chunk_size = sizer.chunk_size
+    read_size = 0
+    with filepath.open('rb') as f:
+        while is_running():
+            start = time.perf_counter()
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            chunk_size = sizer.observe(time.perf_counter() - start)
+            if throttle is not None:
+                throttle.acquire(len(chunk), is_running)
+            md5.update(chunk)
+            read_size += len(chunk)
+            if on_progress is not None:
+                on_progress(int((read_size / total_size) * 100))
+    if not is_running():
+        return 0, '本地 MD5 暂未校验'
+    if total_size == 0 and on_progress is not None:
+        on_progress(100)
+    md5_value = md5.hexdigest()
+    return (-1 if md5_value != data_md5 else 1), md5_value
+
+
 def resource_path(relative_path: str):
     """将相对路径转为exe运行时资源文件的绝对路径"""
     # _MEIPASS 是exe运行时的临时目录路径
@@ -0,0 +1,8 @@
+"""
+分布式校验：协调者（coordinator）将预设清单拆分为以文件为单位的任务，
+通过 TCP 或 Unix 套接字分发给任意数量的工作进程（worker），汇总结果并生成报告
+
+MD5 无法由文件分段的 MD5 合并得到，所以任务的最小单位是单个文件
+"""
+from .coordinator import Coordinator
+from .worker import run_worker, verify_file
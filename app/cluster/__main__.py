@@ -0,0 +1,102 @@
+"""
+分布式校验命令行入口，在项目文件夹中运行：
+
+    协调者：python -m app.cluster coordinator <presets.json> --listen 0.0.0.0:9527 [--report report.json]
+    工作进程：python -m app.cluster worker --connect <协调者地址> [--root 游戏文件目录]
+
+单机测试时可以让协调者直接启动若干本地工作进程：
+    python -m app.cluster coordinator presets.json --listen unix:/tmp/hamster.sock --local-workers 4 --root 游戏文件目录
+"""
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+from app.bases import config
+from app.bases.models import Preset
+from .coordinator import Coordinator
+from .worker import run_worker
+
+
+def load_presets(path):
+    """读取与 build.bat 相同格式的 json 预设文件"""
+    with open(path, 'r', encoding='utf-8') as fr:
+        data = json.load(fr)
+    return [
+        Preset(preset['filename'], preset['data_md5'], preset.get('data_size')) for preset in data.get('presets') or []
+    ]
+
+
+def run_coordinator(args):
+    coordinator = Coordinator(load_presets(args.presets), args.listen, args.timeout)
+    address = coordinator.listen()
+    print(f'* 协调者已监听：{address}，共 {len(coordinator.presets)} 个文件待校验')
+    processes = [
+        subprocess.Popen([sys.executable, '-m', 'app.cluster', 'worker', '--connect', address, '--root', args.root])
+        for _ in range(args.local_workers)
+    ]
+    aborted = False
+    try:
+        while not coordinator.wait(1):
+            # 本地工作进程全部退出（比如启动失败），且没有其他工作进程连接时，剩余的任务永远无法完成
+            if processes and all(p.poll() is not None for p in processes) and not coordinator.connected:
+                codes = ', '.join(str(p.returncode) for p in processes)
+                print(f'* 错误：本地工作进程已全部退出（退出码 {codes}），且没有其他工作进程连接，校验中止',
+                      file=sys.stderr)
+                aborted = True
+                break
+    finally:
+        coordinator.close()
+    report = coordinator.report()
+    for process in processes:
+        process.wait()
+
+    for row in report['results']:
+        if row['state'] != 1:
+            print(f"* {config.STATE_STYLES.get(row['state'], config.DEFAULT_CELL).display_name}：{row['filename']}")
+    print(f"* 校验{'中止' if aborted else '完毕'}，通过 {report['passed']}/{report['total']}，重新分配 {report['reassigned']} 次")
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as fw:
+            json.dump(report, fw, ensure_ascii=False, indent=4)
+    if aborted:
+        return 2
+    return 0 if report['passed'] == report['total'] else 1
+
+
+def positive_float(value):
+    """argparse 类型：大于 0 的浮点数"""
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f'必须大于 0：{value}')
+    return number
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m app.cluster', description='分布式 MD5 校验')
+    subparsers = parser.add_subparsers(dest='role')
+    subparsers.required = True
+
+    coordinator_parser = subparsers.add_parser('coordinator', help='分发任务并汇总结果')
+    coordinator_parser.add_argument('presets', type=str, help='预设 json 文件的路径')
+    coordinator_parser.add_argument('--listen', type=str, default='127.0.0.1:9527', help='监听地址')
+    coordinator_parser.add_argument(
+        '--timeout', type=positive_float, default=30, help='工作进程无响应多久视为失效（秒），心跳间隔为其 1/3')
+    coordinator_parser.add_argument('--report', type=str, default='', help='汇总报告输出的 json 文件路径')
+    coordinator_parser.add_argument('--local-workers', type=int, default=0, help='同时在本机启动的工作进程数量')
+    coordinator_parser.add_argument('--root', type=str, default='.', help='本地工作进程使用的游戏文件目录')
+
+    worker_parser = subparsers.add_parser('worker', help='领取任务并校验')
+    worker_parser.add_argument('--connect', type=str, default='127.0.0.1:9527', help='协调者地址')
+    worker_parser.add_argument('--root', type=str, default='.', help='游戏文件目录')
+    worker_parser.add_argument('--name', type=str, default=None, help='工作进程名称，默认为 主机名:进程号')
+
+    args = parser.parse_args()
+    if args.role == 'coordinator':
+        return run_coordinator(args)
+    count = run_worker(args.connect, str(Path(args.root)), args.name)
+    print(f'* 工作进程结束，共校验 {count} 个文件')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
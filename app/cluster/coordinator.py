@@ -0,0 +1,182 @@
+"""
+协调者：持有预设清单，向连接上来的工作进程逐个分发任务并收集结果
+工作进程断开连接，或者超过 timeout 秒没有任何消息（包括心跳）时视为失效，其未完成的任务重新分配
+心跳间隔随任务下发，为 timeout 的 1/3，保证任意超时时间下正常工作的进程都不会被误判
+"""
+import os
+import socket
+import threading
+import collections
+import socketserver
+import typing as t
+from app.bases.models import Preset
+from .protocol import Connection, parse_address, format_address
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, 'ThreadingUnixStreamServer'):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+else:  # Windows 下没有 Unix 套接字
+    _UnixServer = None
+
+
+class _WorkerHandler(socketserver.BaseRequestHandler):
+    """每个工作进程连接对应一个处理线程"""
+
+    def handle(self):
+        coordinator = self.server.coordinator
+        self.request.settimeout(coordinator.timeout)
+        conn = Connection(self.request)
+        unit = name = None
+        try:
+            hello = conn.receive()
+            if not hello or hello.get('type') != 'hello':
+                return None
+            name = hello.get('name') or str(self.client_address)
+            coordinator.connect(name)
+            while True:
+                unit = coordinator.take(name)
+                if unit is None:
+                    conn.send('done')
+                    return None
+                preset = coordinator.presets[unit]
+                conn.send('task', id=unit, filename=preset.filename, data_md5=preset.data_md5,
+                          heartbeat=coordinator.heartbeat)
+                while True:
+                    message = conn.receive()
+                    if message is None:  # 工作进程断开
+                        return None
+                    if message.get('type') == 'result' and message.get('id') == unit:
+                        coordinator.complete(unit, name, message['state'], message['md5'])
+                        unit = None
+                        break
+                    # 其余消息（心跳）只用于刷新超时
+        except (OSError, ValueError):  # 包括 socket.timeout 以及无法解析的消息
+            return None
+        finally:
+            if unit is not None:
+                coordinator.requeue(unit, name)
+            if name is not None:
+                coordinator.disconnect(name)
+            conn.close()
+
+
+class Coordinator:
+    def __init__(self, presets: t.List[Preset], address: str, timeout=30):
+        if timeout <= 0:
+            raise ValueError('timeout 必须大于 0')
+        self.presets = presets
+        self.address = address  # 监听地址，端口为 0 时 serve 后会更新为实际端口
+        self.timeout = timeout  # 工作进程多久没有消息视为失效（秒）
+        self.heartbeat = timeout / 3  # 下发给工作进程的心跳间隔（秒）
+        self.connected = collections.Counter()  # 当前连接的工作进程名称 -> 连接数
+        self.queue = collections.deque(range(len(presets)))  # 待分配的任务（预设下标）
+        self.assigned = {}  # 已分配未完成的任务 -> 工作进程名称
+        self.results = {}  # 任务 -> (state, md5, 工作进程名称)
+        self.reassigned = 0  # 因工作进程失效而重新分配的次数
+        self._condition = threading.Condition()
+        self._server = None
+
+    def listen(self):
+        """开始监听，返回实际监听的地址"""
+        family, addr = parse_address(self.address)
+        if family == socket.AF_UNIX:
+            if _UnixServer is None:
+                raise OSError('当前系统不支持 Unix 套接字')
+            if os.path.exists(addr):
+                os.unlink(addr)
+            self._server = _UnixServer(addr, _WorkerHandler)
+        else:
+            self._server = _TCPServer(addr, _WorkerHandler)
+        self._server.coordinator = self
+        self.address = format_address(family, self._server.server_address)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.address
+
+    def wait(self, timeout=None):
+        """等待全部任务完成，返回是否完成"""
+        with self._condition:
+            return self._condition.wait_for(self.is_done, timeout)
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            family, addr = parse_address(self.address)
+            if family == socket.AF_UNIX and os.path.exists(addr):
+                os.unlink(addr)
+            self._server = None
+
+    def serve(self):
+        """监听并阻塞直到全部任务完成，返回汇总报告"""
+        if self._server is None:
+            self.listen()
+        try:
+            self.wait()
+        finally:
+            self.close()
+        return self.report()
+
+    def is_done(self):
+        return len(self.results) == len(self.presets)
+
+    def take(self, name):
+        """为工作进程取出一个任务，暂无可分配任务时等待（其他进程的任务可能被重新分配），全部完成时返回 None"""
+        with self._condition:
+            while not self.queue:
+                if self.is_done():
+                    return None
+                self._condition.wait(1)
+            unit = self.queue.popleft()
+            self.assigned[unit] = name
+            return unit
+
+    def connect(self, name):
+        with self._condition:
+            self.connected[name] += 1
+
+    def disconnect(self, name):
+        with self._condition:
+            self.connected[name] -= 1
+            if self.connected[name] <= 0:
+                del self.connected[name]
+
+    def complete(self, unit, name, state, md5):
+        with self._condition:
+            self.assigned.pop(unit, None)
+            if unit not in self.results:
+                self.results[unit] = (state, md5, name)
+            self._condition.notify_all()
+
+    def requeue(self, unit, name):
+        """工作进程失效，将其未完成的任务放回队首"""
+        with self._condition:
+            if self.assigned.pop(unit, None) is not None and unit not in self.results:
+                self.queue.appendleft(unit)
+                self.reassigned += 1
+            self._condition.notify_all()
+
+    def report(self):
+        """按预设顺序合并所有结果"""
+        with self._condition:
+            rows = []
+            for unit, preset in enumerate(self.presets):
+                state, md5, name = self.results.get(unit, (0, '本地 MD5 暂未校验', None))
+                rows.append({
+                    'filename': preset.filename,
+                    'data_md5': preset.data_md5,
+                    'local_md5': md5,
+                    'state': state,
+                    'worker': name,
+                })
+            return {
+                'total': len(rows),
+                'passed': sum(row['state'] == 1 for row in rows),
+                'reassigned': self.reassigned,
+                'results': rows,
+            }
@@ -0,0 +1,65 @@
+"""
+协调者与工作进程之间的通信协议
+每条消息是一行 UTF-8 编码的 JSON，以换行结尾，type 字段表示消息类型：
+    工作进程 -> 协调者：hello（连接后首条，附带名称）、heartbeat（校验中定时发送）、result（校验结果）
+    协调者 -> 工作进程：task（校验任务）、done（全部完成，断开连接）
+
+地址格式：host:port 表示 TCP，unix:/path/to.sock 表示 Unix 套接字
+"""
+import json
+import socket
+import threading
+
+UNIX_PREFIX = 'unix:'
+
+
+def parse_address(address: str):
+    """将地址字符串解析为 (套接字族, 地址)"""
+    if address.startswith(UNIX_PREFIX):
+        return socket.AF_UNIX, address[len(UNIX_PREFIX):]
+    host, _, port = address.rpartition(':')
+    return socket.AF_INET, (host or '127.0.0.1', int(port))
+
+
+def format_address(family, address):
+    """parse_address 的逆操作，用于打印实际监听的地址（比如端口为 0 时）"""
+    if family == socket.AF_UNIX:
+        return f'{UNIX_PREFIX}{address}'
+    return f'{address[0]}:{address[1]}'
+
+
+def connect(address: str, timeout=None):
+    family, addr = parse_address(address)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    sock.connect(addr)
+    return sock
+
+
+class Connection:
+    """对套接字的简单封装，按行收发 JSON 消息，发送是线程安全的（心跳线程与主线程共用）"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.reader = sock.makefile('rb')
+        self._send_lock = threading.Lock()
+
+    def send(self, message_type, **fields):
+        fields['type'] = message_type
+        data = (json.dumps(fields, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._send_lock:
+            self.sock.sendall(data)
+
+    def receive(self):
+        """读取下一条消息，连接关闭时返回 None；超时抛出 socket.timeout"""
+        line = self.reader.readline()
+        if not line:
+            return None
+        return json.loads(line.decode('utf-8'))
+
+    def close(self):
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
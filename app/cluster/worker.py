@@ -0,0 +1,58 @@
+"""
+工作进程：连接协调者，循环领取任务、校验文件并返回结果，直到协调者通知全部完成
+文件路径相对于 root（各主机上挂载的同一份游戏目录）
+"""
+import os
+import socket
+import threading
+from pathlib import Path
+from app.bases.utils import verify_md5
+from .protocol import Connection, connect
+
+
+def verify_file(filepath, data_md5):
+    """校验单个文件，返回 (state, md5)，与界面的 MD5Worker 使用同一个 verify_md5"""
+    try:
+        return verify_md5(filepath, data_md5)
+    except Exception:
+        return -2, '程序异常，无法计算'
+
+
+def _heartbeat(conn, interval, stop_event):
+    while not stop_event.wait(interval):
+        try:
+            conn.send('heartbeat')
+        except OSError:
+            return None
+
+
+def run_worker(address, root='.', name=None, heartbeat=5):
+    """
+    运行工作进程直到全部完成，返回本进程校验的文件数量
+    心跳间隔优先使用协调者随任务下发的值（由其超时时间推算），heartbeat 只在协调者未下发时使用
+    """
+    name = name or f'{socket.gethostname()}:{os.getpid()}'
+    conn = Connection(connect(address))
+    count = 0
+    try:
+        conn.send('hello', name=name)
+        while True:
+            message = conn.receive()
+            if message is None or message.get('type') == 'done':
+                return count
+            if message.get('type') != 'task':
+                continue
+            # 大文件校验耗时较长，期间定时发送心跳，避免被协调者当作失效
+            stop_event = threading.Event()
+            interval = message.get('heartbeat') or heartbeat
+            beater = threading.Thread(target=_heartbeat, args=(conn, interval, stop_event), daemon=True)
+            beater.start()
+            try:
+                state, md5 = verify_file(Path(root) / message['filename'], message['data_md5'])
+            finally:
+                stop_event.set()
+                beater.join()
+            conn.send('result', id=message['id'], state=state, md5=md5)
+            count += 1
+    finally:
+        conn.close()
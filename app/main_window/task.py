@@ -1,12 +1,31 @@
 """
 主窗口逻辑任务列表
 """
+import os
+import time
+import shutil
 import hashlib
-import random
+import tarfile
+import tempfile
+import collections
 from pathlib import Path
 from PySide2 import QtCore, QtWidgets, QtGui
 from app.bases import config
-from app.bases.models import TableModel, Preset
+from app.bases.models import Preset
+from app.bases.table import TableModel
+from app.bases.utils import ChunkSizer, Throttle, verify_md5
+
+# 小于该大小的文件视为小文件，合并为批量任务校验
+SMALL_FILE_SIZE = 1024 * 1024
+# 单个批量任务最多包含的文件数量、文件总大小
+BATCH_MAX_COUNT = 64
+BATCH_MAX_BYTES = 8 * 1024 * 1024
+# 监视模式下，无法使用系统通知（比如 inotify 监视数量超限）的文件改为轮询，轮询间隔（毫秒）
+WATCH_POLL_INTERVAL = 1000
+# 跟随模式下检查文件是否增长的间隔（秒）
+FOLLOW_POLL_INTERVAL = 0.5
+# 跟随模式下文件尚未出现时，线程池重新检查的间隔（毫秒）
+FOLLOW_RETRY_INTERVAL = 1000
 
 
 def get_cell(state, default_=config.DEFAULT_CELL):
@@ -16,80 +35,359 @@ def get_cell(state, default_=config.DEFAULT_CELL):
 class MD5WorkerSignals(QtCore.QObject):
     """
     关于 state 的值:
-          程序异常（-2）、失败（-1）、未校验（0）、通过（1）、校验中（2）、文件缺失（3）
+          程序异常（-2）、失败（-1）、未校验（0）、通过（1）、校验中（2）、文件缺失（3）、安装完成（4）
     信号描述：
         beginning：任务开始时
         error：任务执行过程中异常
         progress：任务进度
         finished：任务完成时
+        batchFinished：批量任务完成时，一次性返回其中所有文件的结果，以及实际不是小文件、需要单独校验的预设
+        waiting：跟随模式下文件尚未出现，任务直接结束并交还线程，由线程池稍后重试
     """
     beginning = QtCore.Signal(int)  # row
     error = QtCore.Signal(int, Exception)  # (row, exception)
     progress = QtCore.Signal(int, int)  # (row, progress)
     finished = QtCore.Signal(int, int, str)  # (row, state, md5)
+    waiting = QtCore.Signal(int)  # row
+    batchFinished = QtCore.Signal(list, list)  # ([(row, state, md5, progress), ...], [(row, filepath, data_md5, size), ...])
 
 
 class MD5Worker(QtCore.QRunnable):
-    def __init__(self, row, filepath, data_md5):
+    def __init__(self, row, filepath, data_md5, signals=None):
         super().__init__()
         self.row = row  # 传入的行，用于回显
         self.filepath = filepath  # 传入的相对路径，用于查看校验
         self.data_md5 = data_md5  # 传入的预设 MD5，用于比较
         self._is_running = True  # 表示运行状态，正在运行中（实例化后即运行）
-        self.signals = MD5WorkerSignals()  # 连接的信号槽对象
-        self.chunk_size = random.randint(32, 128) * 1024  # 小文件每次读取的块大小 32kb~128kb
+        self.signals = signals or MD5WorkerSignals()  # 连接的信号槽对象，由线程池提交时共享线程池的信号
+        self.chunk_size = 0  # 每次读取的块大小，运行时由 ChunkSizer 校准并动态调整
         self.read_size = 0  # 已读取的字节数
+        self.throttle = None  # 快速/后台模式的限速器，提交到线程池时由 MD5WorkerPool 设置
 
     def run(self):
         """执行 MD5 校验任务"""
         try:
             # 发出任务开始信号
+            self.signals.beginning.emit(self.row)
+            # 块大小按所在设备校准，读取过程中根据耗时动态调整；文件缺失时直接返回失败
+            state, md5_value = verify_md5(
+                self.filepath, self.data_md5, self.throttle, lambda: self._is_running,
+                lambda progress: self.signals.progress.emit(self.row, progress))
+            if state == 0:  # 被停止
+                self.signals.progress.emit(self.row, 0)
+            # 正确执行完成校验的情况（不代表校验通过，需要比较值）
+            self.signals.finished.emit(self.row, state, md5_value)
+        except Exception as e:
+            # 处理其他不可预知的异常情况
+            self.signals.error.emit(self.row, e)
+            self.signals.finished.emit(self.row, -2, '程序异常，无法计算')
+
+    def stop(self):
+        """停止任务的执行"""
+        self._is_running = False
+
+
+class FollowMD5Worker(MD5Worker):
+    """
+    跟随模式：校验仍在下载中的文件，边下载边计算 MD5
+    读到文件末尾后不结束，定时检查并继续读取新追加的数据；
+    文件达到预设大小（未配置大小时不做要求），且大小和修改时间（fstat）都停止变化 FOLLOW_SETTLE 毫秒后给出校验结果；
+    已下载完成的文件（修改时间早于 FOLLOW_SETTLE 毫秒前）读完即给出结果
+    下载工具预先分配好文件大小、再原地写入时，文件大小不变而修改时间变化，说明已读取的内容可能过期，从头重新计算
+    """
+
+    def __init__(self, row, filepath, data_md5, signals=None, data_size=None):
+        super().__init__(row, filepath, data_md5, signals)
+        self.data_size = data_size  # 预设的文件大小，用于计算进度以及判断下载是否完成
+
+    def _wait(self, seconds):
+        """分段休眠，停止时尽快返回"""
+        deadline = time.monotonic() + seconds
+        while self._is_running and time.monotonic() < deadline:
+            time.sleep(min(FOLLOW_POLL_INTERVAL, deadline - time.monotonic()))
+
+    def run(self):
+        """执行跟随校验任务"""
+        try:
             self.signals.beginning.emit(self.row)
             filepath = Path(self.filepath)
-            # 如果文件不存在，则失败
+            settle = config.FOLLOW_SETTLE / 1000
+            # 下载尚未开始（或者仍以临时文件名下载）时不占用线程等待，交还线程池稍后重试
             if not filepath.exists():
-                self.signals.finished.emit(self.row, -1, '文件缺失，无法计算')
+                self.signals.waiting.emit(self.row)
                 return None
 
-            # 初始化 MD5 哈希对象
             md5 = hashlib.md5()
-            # 文件分块计算
-            total_size = filepath.stat().st_size
-            # 大文件 超过 1GB 分块范围则是 256kb~1mb
-            if total_size >= 1024 * 1024 * 1024:
-                self.chunk_size = random.randint(256, 1024) * 1024
+            sizer = ChunkSizer(filepath)
+            self.chunk_size = sizer.chunk_size
 
             with filepath.open('rb') as f:
+                pass_stat = os.fstat(f.fileno())  # 本轮从头计算开始时的文件状态
+                observed, observed_at = None, time.monotonic()  # 最近一次观察到的 (大小, 修改时间) 及其开始时刻
                 while self._is_running:
+                    start = time.perf_counter()
                     chunk = f.read(self.chunk_size)
-                    if not chunk:
-                        break
-                    md5.update(chunk)
-                    self.read_size += len(chunk)
-                    # 计算进度，并发出信号通知
-                    progress = int((self.read_size / total_size) * 100)
-                    self.signals.progress.emit(self.row, progress)
+                    if chunk:
+                        self.chunk_size = sizer.observe(time.perf_counter() - start)
+                        # 只为实际读到的数据取令牌，在末尾等待新数据时不占用限速额度
+                        if self.throttle is not None:
+                            self.throttle.acquire(len(chunk), lambda: self._is_running)
+                        md5.update(chunk)
+                        self.read_size += len(chunk)
+                        total_size = self.data_size or os.fstat(f.fileno()).st_size
+                        self.signals.progress.emit(self.row, min(int((self.read_size / max(total_size, 1)) * 100), 100))
+                        continue
+
+                    stat = os.fstat(f.fileno())
+                    if stat.st_size > self.read_size:  # 读到末尾后又追加了数据
+                        continue
+                    if stat.st_size < self.read_size:
+                        # 文件被截断（比如重新下载），从头开始计算
+                        md5, pass_stat = self._restart(f)
+                        continue
+                    if (stat.st_size, stat.st_mtime_ns) != observed:
+                        observed, observed_at = (stat.st_size, stat.st_mtime_ns), time.monotonic()
+                    # 修改时间已足够久远（已下载完成的文件），或者观察到大小和修改时间保持不变足够久
+                    settled = (time.time() - stat.st_mtime_ns / 1e9 >= settle
+                               or time.monotonic() - observed_at >= settle)
+                    reached = self.data_size is None or self.read_size >= self.data_size
+                    if not (settled and reached):
+                        self._wait(FOLLOW_POLL_INTERVAL)
+                        continue
+                    if stat.st_size == pass_stat.st_size and stat.st_mtime_ns != pass_stat.st_mtime_ns:
+                        # 本轮计算期间文件大小不变却被修改过（原地写入），已读取的内容可能过期
+                        md5, pass_stat = self._restart(f)
+                        continue
+                    break
+
             if self._is_running:
-                # 计算最终的 MD5 值
                 md5_value = md5.hexdigest()
-                # 正确执行完成校验的情况（不代表校验通过，需要比较值）
-                if total_size == 0:
-                    self.signals.progress.emit(self.row, 100)
+                self.signals.progress.emit(self.row, 100)
                 state = -1 if md5_value != self.data_md5 else 1
                 self.signals.finished.emit(self.row, state, md5_value)
             else:
                 self.signals.progress.emit(self.row, 0)
                 self.signals.finished.emit(self.row, 0, "本地 MD5 暂未校验")
         except Exception as e:
-            # 处理其他不可预知的异常情况
             self.signals.error.emit(self.row, e)
             self.signals.finished.emit(self.row, -2, '程序异常，无法计算')
 
+    def _restart(self, f):
+        """从头开始计算，返回新的 MD5 对象以及本轮开始时的文件状态"""
+        f.seek(0)
+        self.read_size = 0
+        self.signals.progress.emit(self.row, 0)
+        return hashlib.md5(), os.fstat(f.fileno())
+
+
+class CalibrateWorker(QtCore.QRunnable):
+    """启动时在后台为预设文件所在的设备校准读取块大小（见 ChunkSizer）"""
+
+    def __init__(self, filepaths):
+        super().__init__()
+        self.filepaths = list(filepaths)
+
+    def run(self):
+        ChunkSizer.calibrate_paths(self.filepaths)
+
+
+class BatchMD5Worker(QtCore.QRunnable):
+    """
+    小文件批量校验任务：连续计算多个小文件的 MD5，完成后通过 batchFinished 一次性返回结果
+    省去每个文件单独调度、发送开始/进度/完成信号以及界面逐行刷新的开销
+    文件大小在工作线程中检查（预设未配置大小时，提交时并不知道是否为小文件），
+    不小于 SMALL_FILE_SIZE 的文件不在批量中读取，原样返回由线程池单独校验（批量被停止时按未校验返回）
+    """
+
+    def __init__(self, presets, signals=None):
+        super().__init__()
+        self.presets = presets  # [(row, filepath, data_md5), ...]
+        self.rows = [row for row, _, _ in presets]
+        self._is_running = True
+        self.signals = signals or MD5WorkerSignals()
+        self.throttle = None
+
+    def run(self):
+        """依次校验批量中的每个文件"""
+        results, spilled = [], []
+        for row, filepath, data_md5 in self.presets:
+            if not self._is_running:
+                results.append((row, 0, '本地 MD5 暂未校验', 0))
+                continue
+            try:
+                filepath = Path(filepath)
+                if not filepath.exists():
+                    results.append((row, -1, '文件缺失，无法计算', 0))
+                    continue
+                with filepath.open('rb') as f:
+                    size = os.fstat(f.fileno()).st_size
+                    if size >= SMALL_FILE_SIZE:
+                        spilled.append((row, str(filepath), data_md5, size))
+                        continue
+                    md5 = hashlib.md5()
+                    # 文件在检查大小之后仍可能增长，按块读取，单次读取不超过 SMALL_FILE_SIZE
+                    while self._is_running:
+                        chunk = f.read(SMALL_FILE_SIZE)
+                        if not chunk:
+                            break
+                        if self.throttle is not None:
+                            self.throttle.acquire(len(chunk), lambda: self._is_running)
+                        md5.update(chunk)
+                if not self._is_running:
+                    results.append((row, 0, '本地 MD5 暂未校验', 0))
+                    continue
+                md5_value = md5.hexdigest()
+                state = -1 if md5_value != data_md5 else 1
+                results.append((row, state, md5_value, 100))
+            except Exception as e:
+                self.signals.error.emit(row, e)
+                results.append((row, -2, '程序异常，无法计算', 0))
+        if not self._is_running:
+            # 已停止时不再单独校验，恢复为未校验
+            results.extend((row, 0, '本地 MD5 暂未校验', 0) for row, _, _, _ in spilled)
+            spilled = []
+        self.signals.batchFinished.emit(results, spilled)
+
     def stop(self):
-        """停止任务的执行"""
+        """停止任务的执行，尚未校验的文件恢复为未校验"""
         self._is_running = False
 
 
+class InstallCancelled(Exception):
+    """安装任务被停止"""
+
+
+def is_safe_member(member: tarfile.TarInfo, directory):
+    """压缩包成员解压后（包括链接指向）是否仍在目标目录内，设备文件一律拒绝"""
+    root = os.path.realpath(directory)
+    target = os.path.realpath(os.path.join(root, member.name))
+    if os.path.commonpath([root, target]) != root:
+        return False
+    if member.issym() or member.islnk():
+        base = os.path.dirname(target) if member.issym() else root
+        link = os.path.realpath(os.path.join(base, member.linkname))
+        if os.path.commonpath([root, link]) != root:
+            return False
+    return not (member.ischr() or member.isblk() or member.isfifo())
+
+
+def check_install_target(target: Path):
+    """安装目标已存在但不是目录（比如与压缩包同名的普通文件）时拒绝安装，避免用户的文件被替换删除"""
+    if target.is_symlink() or (target.exists() and not target.is_dir()):
+        raise FileExistsError(f'{target} 已存在且不是目录，无法安装')
+
+
+def replace_directory(source: Path, target: Path):
+    """
+    用 source 目录替换 target 目录（同一文件系统内重命名），原有的 target 在替换成功后删除
+    替换失败时将原有的 target 恢复原位后再抛出异常；target 不是目录时拒绝替换
+    """
+    check_install_target(target)
+    if not target.exists():
+        os.replace(str(source), str(target))
+        return None
+    backup = target.with_name(f'.{target.name}.{os.getpid()}.old')
+    os.replace(str(target), str(backup))
+    try:
+        os.replace(str(source), str(target))
+    except BaseException:
+        os.replace(str(backup), str(target))
+        raise
+    shutil.rmtree(str(backup), ignore_errors=True)
+
+
+class HashingReader:
+    """
+    只读文件包装，供 tarfile 以流模式读取
+    每次读取的同时计算 MD5、按模式限速并发出进度，保证整个文件只被读取一次
+    每次读取的大小由 tarfile 的 bufsize 决定（打开时按设备校准一次），这里不做动态调整
+    """
+
+    def __init__(self, worker, f, md5, total_size):
+        self.worker = worker
+        self.f = f
+        self.md5 = md5
+        self.total_size = total_size
+
+    def read(self, size=-1):
+        worker = self.worker
+        if not worker._is_running:
+            raise InstallCancelled()
+        chunk = self.f.read(size)
+        if chunk:
+            if worker.throttle is not None:
+                worker.throttle.acquire(len(chunk), lambda: worker._is_running)
+            self.md5.update(chunk)
+            worker.read_size += len(chunk)
+            worker.signals.progress.emit(worker.row, int((worker.read_size / self.total_size) * 100))
+        return chunk
+
+
+class InstallWorker(MD5Worker):
+    """
+    校验并安装 .tar 预设：只读取一遍文件，边计算 MD5 边解压到同目录下的临时目录
+    MD5 一致时将临时目录整体重命名为压缩包同名目录（xx.tar -> xx），不一致时删除临时目录
+    """
+    # tarfile 的解压过滤在 3.12 加入，并移植到了 3.8.17、3.9.17、3.10.12、3.11.4 等安全更新版本，可用时一并启用
+    extract_kwargs = {'filter': 'data'} if hasattr(tarfile, 'data_filter') else {}
+
+    def run(self):
+        """执行校验并安装任务"""
+        staging = None
+        try:
+            self.signals.beginning.emit(self.row)
+            filepath = Path(self.filepath)
+            if not filepath.exists():
+                self.signals.finished.emit(self.row, -1, '文件缺失，无法计算')
+                return None
+
+            md5 = hashlib.md5()
+            total_size = filepath.stat().st_size or 1
+            self.chunk_size = ChunkSizer.calibrate(filepath)
+            target = filepath.with_suffix('')
+            check_install_target(target)
+            # 临时目录与目标目录在同一文件系统中，完成后可以直接重命名
+            staging = Path(tempfile.mkdtemp(prefix=f'.{target.name}.', suffix='.staging', dir=str(filepath.parent)))
+            tar_error = None
+
+            with filepath.open('rb') as f:
+                reader = HashingReader(self, f, md5, total_size)
+                try:
+                    with tarfile.open(fileobj=reader, mode='r|*', bufsize=self.chunk_size) as tar:
+                        for member in tar:
+                            if not is_safe_member(member, str(staging)):
+                                raise tarfile.TarError(f'不安全的路径：{member.name}')
+                            tar.extract(member, str(staging), **self.extract_kwargs)
+                except tarfile.TarError as e:
+                    # 压缩包损坏时继续读完文件，由 MD5 给出校验结论
+                    tar_error = e
+                # 结束标记之后可能还有填充数据，读完才能得到整个文件的 MD5
+                while reader.read(self.chunk_size):
+                    pass
+
+            md5_value = md5.hexdigest()
+            if md5_value != self.data_md5:
+                self.signals.finished.emit(self.row, -1, md5_value)
+                return None
+            if tar_error is not None:
+                raise tar_error
+
+            staging.chmod(0o755)
+            replace_directory(staging, target)
+            staging = None
+            self.signals.progress.emit(self.row, 100)
+            self.signals.finished.emit(self.row, 4, md5_value)
+        except InstallCancelled:
+            self.signals.progress.emit(self.row, 0)
+            self.signals.finished.emit(self.row, 0, "本地 MD5 暂未校验")
+        except Exception as e:
+            self.signals.error.emit(self.row, e)
+            self.signals.finished.emit(self.row, -2, '程序异常，无法计算')
+        finally:
+            if staging is not None:
+                shutil.rmtree(str(staging), ignore_errors=True)
+
+
 class MD5WorkerPool(QtCore.QThreadPool):
     allDone = QtCore.Signal()
 
@@ -99,35 +397,294 @@ class MD5WorkerPool(QtCore.QThreadPool):
         self.active_tasks_mutex = QtCore.QMutex()
         self.errors = []
         self.collect_error_mutex = QtCore.QMutex()
-
-    def start(self, runnable: MD5Worker, priority=0):
+        self.throttle = Throttle(config.BACKGROUND_RATE * 1024 * 1024)  # 所有任务共享同一个限速器
+        self.signals = MD5WorkerSignals(self)  # 对外的信号，外部只需连接一次
+        # 任务发出的信号先经过线程池：完成信号在线程池释放任务之后再转发给外部，
+        # 外部处理完最后一个完成信号后，线程池立即判断并发出 allDone（每次全部完成只发出一次）
+        self._worker_signals = MD5WorkerSignals(self)  # 所有任务共享的信号
+        self._worker_signals.beginning.connect(self.signals.beginning)
+        self._worker_signals.progress.connect(self.signals.progress)
+        self._worker_signals.error.connect(self._task_occur_error)
+        self._worker_signals.error.connect(self.signals.error)
+        self._worker_signals.finished.connect(self._task_finished)
+        self._worker_signals.batchFinished.connect(self._batch_finished)
+        self._worker_signals.waiting.connect(self._task_waiting)
+        self._worker_signals.progress.connect(self._on_progress)
+        self.pending = collections.deque()  # 尚未提交的预设迭代器
+        # 跟随模式下文件尚未出现的预设 row -> (row, filepath, data_md5, data_size)，由定时器定期重新提交
+        self.waiting = {}
+        self.retry_timer = QtCore.QTimer(self)
+        self.retry_timer.setSingleShot(True)
+        self.retry_timer.setInterval(FOLLOW_RETRY_INTERVAL)
+        self.retry_timer.timeout.connect(self._retry_waiting)
+        self.last_progress = time.monotonic()  # 最近一次有任务读到数据的时刻
+        self.workers = {}  # 已提交但未完成的任务 row -> worker
+        self.batch_small_files = True  # 是否将小文件合并为批量任务
+
+    def submit(self, presets, install=False, follow=False):
+        """
+        惰性提交预设，presets 为 (row, filepath, data_md5[, data_size]) 的可迭代对象（可以是生成器）
+        同时在途的任务不超过最大线程数的 2 倍，任务完成后再从中取出新的预设
+        小文件会合并为一个批量任务（BatchMD5Worker），批量任务只算作一个在途任务
+        install 为 True 时，.tar 预设使用 InstallWorker 校验并解压安装，其余预设照常校验
+        follow 为 True 时，全部预设使用 FollowMD5Worker 跟随下载中的文件校验（不合并小文件）
+        install 与 follow 不能同时使用（界面勾选跟随模式时会禁用校验并安装），同时为 True 时按 follow 处理
+        跟随模式下尚未出现的文件不占用线程，每 FOLLOW_RETRY_INTERVAL 毫秒重试一次；
+        所有任务都超过 FOLLOW_MISSING_TIMEOUT 毫秒没有读到新数据（没有文件在下载）时，仍未出现的文件按缺失处理
+        """
+        self.last_progress = time.monotonic()
+        self.pending.append((iter(presets), install, follow))
+        self._feed()
+
+    def start(self, runnable: QtCore.QRunnable, priority=0):
+        """启动 submit 中创建的任务（任务共享线程池的信号），外部请使用 submit 提交预设"""
         self.active_tasks_mutex.lock()
         self.active_tasks += 1
         self.active_tasks_mutex.unlock()
 
-        runnable.signals.finished.connect(self._task_finished)
-        runnable.signals.error.connect(self._task_occur_error)
+        runnable.throttle = self.throttle
+        rows = runnable.rows if isinstance(runnable, BatchMD5Worker) else [runnable.row]
+        for row in rows:
+            self.workers[row] = runnable
         super().start(runnable, priority)
 
-    def _task_finished(self):
+    def cancel(self):
+        """停止校验：丢弃尚未提交的预设（包括等待文件出现的预设），并停止已提交的任务"""
+        self.pending.clear()
+        self.waiting.clear()
+        self.retry_timer.stop()
+        for worker in self.workers.values():
+            worker.stop()
+
+    def set_background(self, enabled):
+        """切换快速/后台模式，正在运行的任务在下一次读取时生效"""
+        self.throttle.background = enabled
+
+    def _feed(self):
+        limit = self.maxThreadCount() * 2
+        batch, batch_size = [], 0
+        while self.pending and self.active_tasks < limit:
+            presets, install, follow = self.pending[0]
+            try:
+                preset = next(presets)
+            except StopIteration:
+                self.pending.popleft()
+                continue
+            row, filepath, data_md5 = preset[:3]
+            if follow:
+                data_size = preset[3] if len(preset) > 3 else None
+                self.start(FollowMD5Worker(row, filepath, data_md5, self._worker_signals, data_size))
+                continue
+            if install and str(filepath).lower().endswith('.tar'):
+                self.start(InstallWorker(row, filepath, data_md5, self._worker_signals))
+                continue
+            # 不在界面线程中读取文件大小：预设配置了大小时按配置判断，否则先放入批量，由批量任务检查
+            data_size = (preset[3] if len(preset) > 3 else None) or 0
+            if not self.batch_small_files or data_size >= SMALL_FILE_SIZE:
+                self.start(MD5Worker(row, filepath, data_md5, self._worker_signals))
+                continue
+            batch.append((row, filepath, data_md5))
+            batch_size += data_size
+            if len(batch) >= BATCH_MAX_COUNT or batch_size >= BATCH_MAX_BYTES:
+                self._start_batch(batch)
+                batch, batch_size = [], 0
+        if batch:
+            self._start_batch(batch)
+
+    def _start_batch(self, batch):
+        if len(batch) == 1:  # 只有一个文件时按普通任务处理，保留逐行的校验状态显示
+            self.start(MD5Worker(*batch[0], self._worker_signals))
+        else:
+            self.start(BatchMD5Worker(batch, self._worker_signals))
+
+    def _task_finished(self, row, state, md5):
+        self._release([row])
+        self.signals.finished.emit(row, state, md5)
+        self._continue()
+
+    def _batch_finished(self, results, spilled):
+        self._requeue(spilled)
+        self._release([row for row, _, _, _ in results])
+        self.signals.batchFinished.emit(results, spilled)
+        self._continue()
+
+    def _task_waiting(self, row):
+        worker = self.workers[row]
+        self._release([row])
+        if worker._is_running:
+            self.waiting[row] = (row, worker.filepath, worker.data_md5, worker.data_size)
+            if not self.retry_timer.isActive():
+                self.retry_timer.start()
+        else:  # 等待期间被停止
+            self.signals.finished.emit(row, 0, '本地 MD5 暂未校验')
+        self._continue()
+
+    def _retry_waiting(self):
+        presets, self.waiting = list(self.waiting.values()), {}
+        if time.monotonic() - self.last_progress >= config.FOLLOW_MISSING_TIMEOUT / 1000:
+            # 长时间没有任何文件在增长，说明下载已经结束，仍未出现的文件按缺失处理
+            for row, _, _, _ in presets:
+                self.signals.finished.emit(row, -1, '文件缺失，无法计算')
+        else:
+            self.pending.appendleft((iter(presets), False, True))
+        self._continue()
+
+    def _on_progress(self, row, progress):
+        self.last_progress = time.monotonic()
+
+    def _requeue(self, spilled):
+        # 批量中实际不是小文件的预设，优先于其余尚未提交的预设单独校验
+        if spilled:
+            for row, _, _, _ in spilled:
+                self.workers.pop(row, None)
+            self.pending.appendleft((iter(spilled), False, False))
+
+    def _release(self, rows):
+        for row in rows:
+            self.workers.pop(row, None)
         self.active_tasks_mutex.lock()
         self.active_tasks -= 1
-        if self.active_tasks == 0:
-            self.allDone.emit()
         self.active_tasks_mutex.unlock()
 
+    def _continue(self):
+        # 外部的完成槽函数已经执行（可能又提交了新的预设），再补充任务并判断是否全部完成
+        self._feed()
+        if self.active_tasks == 0 and not self.pending and not self.waiting:
+            self.allDone.emit()
+
     def _task_occur_error(self, row, exception):
         self.collect_error_mutex.lock()
         self.errors.append((row, exception))
         self.collect_error_mutex.unlock()
 
 
+def file_signature(filepath):
+    """文件的特征（inode、大小、修改时间），用于判断文件是否被创建、修改或替换，文件不存在时为 None"""
+    try:
+        stat = Path(filepath).stat()
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class PresetWatcher(QtCore.QObject):
+    """
+    监视模式：预设文件被创建、修改或替换后，等待防抖时间，通知需要重新校验的行
+    QFileSystemWatcher 在 Linux 下使用 inotify，监视数量超限等原因添加失败的目录和文件，
+    由定时器每 WATCH_POLL_INTERVAL 毫秒比较一次文件特征（轮询）
+    每次通知只记录对应的目录、行，防抖结束后才检查这些行，预设数量很多时也不会阻塞界面
+    信号描述：
+        changed：文件发生变化的行列表
+    """
+    changed = QtCore.Signal(list)  # rows
+
+    def __init__(self, debounce, parent=None):
+        super().__init__(parent=parent)
+        self.filenames = []  # 每行对应的文件路径
+        self.signatures = {}  # 行 -> 最近一次校验时的文件特征
+        self.polled = {}  # 需要轮询的行 -> 上一次轮询时的文件特征
+        self.file_rows = {}  # 文件绝对路径 -> 行
+        self.directory_rows = {}  # 目录绝对路径 -> 其中文件所在的行
+        self.dirty_rows = set()  # 收到通知、等待防抖结束后检查的行
+        self.dirty_directories = set()  # 收到通知、等待防抖结束后重新添加文件监视的目录
+        self.watcher = QtCore.QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self._on_directory_changed)  # 目录中文件的创建、删除、重命名
+        self.watcher.fileChanged.connect(self._on_file_changed)  # 文件内容的修改、被替换
+        self.debounce_timer = QtCore.QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(debounce)
+        self.debounce_timer.timeout.connect(self._check_changes)
+        self.poll_timer = QtCore.QTimer(self)
+        self.poll_timer.setInterval(WATCH_POLL_INTERVAL)
+        self.poll_timer.timeout.connect(self._poll)
+
+    def start(self, filenames):
+        """开始监视，以当前的文件状态作为基准"""
+        self.stop()
+        self.filenames = list(filenames)
+        self.signatures = {row: file_signature(f) for row, f in enumerate(self.filenames)}
+        resolved = {}  # 每个目录只解析一次绝对路径
+        for row, filename in enumerate(self.filenames):
+            parent = Path(filename).parent
+            if parent not in resolved:
+                resolved[parent] = str(parent.resolve())
+            directory = resolved[parent]
+            self.directory_rows.setdefault(directory, []).append(row)
+            self.file_rows.setdefault(os.path.join(directory, Path(filename).name), []).append(row)
+        failed = set(self.watcher.addPaths(list(self.directory_rows)))
+        # 目录无法监视时，其中文件的创建、替换只能靠轮询发现
+        self._poll_rows(row for directory in failed for row in self.directory_rows[directory])
+        self._watch_files(self.directory_rows)
+
+    def stop(self):
+        """停止监视"""
+        self.debounce_timer.stop()
+        self.poll_timer.stop()
+        self.polled = {}
+        self.file_rows, self.directory_rows = {}, {}
+        self.dirty_rows, self.dirty_directories = set(), set()
+        paths = self.watcher.files() + self.watcher.directories()
+        if paths:
+            self.watcher.removePaths(paths)
+
+    def _watch_files(self, directories):
+        # 文件被替换（重命名覆盖）后原监视会失效，新创建的文件也需要加入监视；只处理给定目录中的文件
+        watched = set(self.watcher.files())
+        paths = []
+        for directory in directories:
+            for row in self.directory_rows.get(directory, []):
+                path = os.path.join(directory, Path(self.filenames[row]).name)
+                # 多行可能对应同一个文件
+                if row not in self.polled and path not in watched and os.path.exists(path):
+                    watched.add(path)
+                    paths.append(path)
+        if paths:
+            failed = self.watcher.addPaths(paths)
+            self._poll_rows(row for path in failed for row in self.file_rows[path])
+
+    def _poll_rows(self, rows):
+        for row in rows:
+            self.polled.setdefault(row, file_signature(self.filenames[row]))
+        if self.polled and not self.poll_timer.isActive():
+            self.poll_timer.start()
+
+    def _poll(self):
+        for row in self.polled:
+            signature = file_signature(self.filenames[row])
+            if signature != self.polled[row]:
+                self.polled[row] = signature
+                self.dirty_rows.add(row)
+                self.debounce_timer.start()
+
+    def _on_directory_changed(self, path):
+        self.dirty_directories.add(path)
+        self.dirty_rows.update(self.directory_rows.get(path, []))
+        self.debounce_timer.start()  # 重新计时，文件持续变化时不会触发
+
+    def _on_file_changed(self, path):
+        self.dirty_rows.update(self.file_rows.get(path, []))
+        self.debounce_timer.start()
+
+    def _check_changes(self):
+        directories, self.dirty_directories = self.dirty_directories, set()
+        self._watch_files(directories)
+        rows = []
+        for row in sorted(self.dirty_rows):
+            signature = file_signature(self.filenames[row])
+            if signature != self.signatures.get(row):
+                self.signatures[row] = signature
+                rows.append(row)
+        self.dirty_rows = set()
+        if rows:
+            self.changed.emit(rows)
+
+
 class PresetProxy(Preset):
     def __init__(self, preset: Preset):
-        super().__init__(preset.filename, preset.data_md5)
+        super().__init__(preset.filename, preset.data_md5, preset.data_size)
         self.is_checked = False  # 无用属性，仅做保留
         self.local_md5 = '本地 MD5 暂未校验'
-        self.state = 0  # 校验失败（-1）、未校验（0）、校验通过（1）、校验中（2）
+        self.state = 0  # 校验失败（-1）、未校验（0）、校验通过（1）、校验中（2）、安装完成（4）
         self.progress = 0
 
 
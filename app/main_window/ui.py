@@ -4,7 +4,7 @@
 from PySide2 import QtCore, QtWidgets, QtGui
 from app.bases import config
 from .view import Ui_MainWindow
-from .task import MD5Worker, MD5WorkerPool, ProgressBarDelegate, PresetTableModel
+from .task import CalibrateWorker, MD5WorkerPool, ProgressBarDelegate, PresetTableModel, PresetWatcher
 
 
 class MainWindow(QtWidgets.QMainWindow):
@@ -19,9 +19,14 @@ class MainWindow(QtWidgets.QMainWindow):
     def init_data(self):
         """构建线程池 工作列表"""
         # 以下为校验过程中所必须（请勿修改，校验逻辑在：task.py -> MD5Worker 类中）
-        self.workers = []  # 校验工作列表
+        self.verifying = False  # 是否正在校验（点击开始校验后，到全部完成或停止之前）
         self.pool = MD5WorkerPool(self)  # 校验专用的线程池
         self.pool.setMaxThreadCount(8)  # 设置线程池最大可用 8 个
+        self.watcher = PresetWatcher(config.WATCH_DEBOUNCE, self)  # 监视模式下预设文件的变化
+        self.queued_rows = set()  # 已提交给线程池（包括尚未取出的预设）、还未收到完成结果的行
+        self.deferred_rows = set()  # 监视到变化时已在校验队列中的行，等本次校验完成后再重新校验
+        # 启动时在后台校准各磁盘的读取块大小，不占用校验线程池
+        QtCore.QThreadPool.globalInstance().start(CalibrateWorker(p.filename for p in config.Config.presets))
 
     def build_interface(self):
         """构建界面中的部分东西"""
@@ -78,6 +83,20 @@ class MainWindow(QtWidgets.QMainWindow):
         self.ui.logoWidget.mousePressEvent = self.open_url_on_logo_click
         # 信号槽：开始校验/停止按钮对应的点击事件 点击执行函数 on_toggle_state_click
         self.ui.toggleStateBtn.clicked.connect(self.on_toggle_state_click)
+        # 信号槽：校验并安装按钮，.tar 预设只读取一遍，校验通过后解压到同名目录
+        self.ui.installBtn.clicked.connect(self.on_install_click)
+        # 信号槽：所有校验任务共享线程池的信号，只需连接一次
+        self.pool.signals.beginning.connect(self.on_preset_verify_beginning)  # 将预设校验开始时的状态传递
+        self.pool.signals.progress.connect(self.on_preset_verify_progress)  # 将预设校验过程中进度的变化传递
+        self.pool.signals.finished.connect(self.on_preset_verify_finished)  # 将预设校验完成后的状态传递
+        self.pool.signals.batchFinished.connect(self.on_preset_batch_finished)  # 将小文件批量校验的结果一次性传递
+        # 信号槽：快速/后台校验模式切换，校验过程中也可以切换，无需重新开始
+        self.ui.backgroundModeCheck.toggled.connect(self.on_background_mode_toggled)
+        # 信号槽：监视模式开关，以及监视到文件变化后仅重新校验对应的行
+        self.ui.watchModeCheck.toggled.connect(self.on_watch_mode_toggled)
+        self.watcher.changed.connect(self.on_watched_presets_changed)
+        # 信号槽：跟随模式下不能校验并安装（安装需要读取完整的文件），勾选后禁用校验并安装按钮
+        self.ui.followModeCheck.toggled.connect(self.update_install_button)
 
     @staticmethod
     def open_url_on_logo_click(event):
@@ -85,29 +104,94 @@ class MainWindow(QtWidgets.QMainWindow):
         if event.button() == QtCore.Qt.MouseButton.LeftButton:
             QtGui.QDesktopServices.openUrl(QtCore.QUrl(config.URL))
 
+    def on_background_mode_toggled(self, checked):
+        """业务逻辑：切换快速/后台模式，后台模式会限速并降低校验线程的优先级"""
+        self.pool.set_background(checked)
+
+    def on_watch_mode_toggled(self, checked):
+        """业务逻辑：开启/关闭监视模式，开启时以当前文件状态为基准"""
+        if checked:
+            self.watcher.start(proxy.filename for proxy in self.preset_model.proxies)
+        else:
+            self.watcher.stop()
+
+    def update_install_button(self):
+        """业务逻辑：校验过程中、或者勾选了跟随下载中的文件时，禁用校验并安装按钮"""
+        self.ui.installBtn.setEnabled(not self.verifying and not self.ui.followModeCheck.isChecked())
+
+    def on_watched_presets_changed(self, rows):
+        """业务逻辑：监视到文件变化，仅重新校验这些行，其余行保留原有结果"""
+        # 已在校验队列中（正在校验，或者等待提交）的行不能重复提交，推迟到本次校验完成后
+        self.deferred_rows.update(row for row in rows if row in self.queued_rows)
+        self.submit_rows([row for row in rows if row not in self.queued_rows])
+
+    def submit_rows(self, rows):
+        """重新校验指定的行"""
+        if not rows:
+            return None
+        self.ui.totalProgressBar.setMaximum(len(self.preset_model.proxies) * 100)
+        proxies = self.preset_model.proxies
+        # 批量校验的小文件不会发出开始信号，提交时先清空这些行上一次的结果
+        for row in rows:
+            proxies[row].state, proxies[row].local_md5, proxies[row].progress = 0, '本地 MD5 暂未校验', 0
+        start_index = self.preset_model.index(min(rows), 0)
+        end_index = self.preset_model.index(max(rows), self.preset_model.columnCount() - 1)
+        self.preset_model.dataChanged.emit(start_index, end_index)
+        self.update_verify_total_progress()
+        self.queued_rows.update(rows)
+        self.pool.submit((row, proxies[row].filename, proxies[row].data_md5, proxies[row].data_size) for row in rows)
+
+    def submit_deferred_rows(self, results):
+        """业务逻辑：推迟的行校验完成后重新提交；被停止（状态为未校验）的行不再重新校验"""
+        rows = [row for row, state in results if row in self.deferred_rows]
+        self.deferred_rows.difference_update(rows)
+        self.submit_rows([row for row, state in results if row in rows and state != 0])
+
     def on_toggle_state_click(self):
         """业务逻辑：校验 MD5 值或者停止校验"""
-        if self.workers:  # 分支：停止校验
+        if self.verifying:  # 分支：停止校验
             self.pool.allDone.disconnect(self.on_preset_verify_all_done)  # 将线程池完成的事件断开
-            for worker in self.workers:
-                worker.stop()  # 停止所有工作
-            self.workers = []  # 工作线程列表置空
+            self.pool.cancel()  # 丢弃未提交的预设，停止所有工作
+            # 被丢弃的预设不会再有完成结果，只有已提交的任务还会返回（状态为未校验）
+            self.queued_rows = set(self.pool.workers)
+            self.deferred_rows &= self.queued_rows
+            self.verifying = False
             self.ui.toggleStateBtn.setText("开始校验")  # 恢复按钮名称
+            self.update_install_button()
             self.ui.totalProgressBar.setValue(0)  # 总进度条归零
             self.preset_model.updateData()
         else:  # 分支：开始校验
-            for row, proxy in enumerate(self.preset_model.proxies):
-                worker = MD5Worker(row, proxy.filename, proxy.data_md5)
-                worker.signals.beginning.connect(self.on_preset_verify_beginning)  # 将预设校验开始时的状态传递
-                worker.signals.progress.connect(self.on_preset_verify_progress)  # 将预设校验过程中进度的变化传递
-                worker.signals.finished.connect(self.on_preset_verify_finished)  # 将预设校验完成后的状态传递
-                self.workers.append(worker)  # 工作表中添加上该线程
-            if self.workers:  # 如果有工作的线程，方可执行下方的初始化
-                self.ui.totalProgressBar.setMaximum(len(self.preset_model.proxies) * 100)
-                self.ui.toggleStateBtn.setText("停止校验")
-                self.pool.allDone.connect(self.on_preset_verify_all_done)  # 将线程池完成的事件连接上
-            for worker in self.workers:
-                self.pool.start(worker)  # 启动工作线程（正式执行校验）
+            self.start_verify()
+
+    def on_install_click(self):
+        """业务逻辑：校验并安装，停止时与校验共用停止校验按钮"""
+        if not self.verifying:
+            self.start_verify(install=True)
+
+    def start_verify(self, install=False):
+        """
+        开始校验全部预设，install 为 True 时 .tar 预设校验通过后同时完成解压安装
+        勾选了跟随下载中的文件时，边下载边校验，文件下载完成后很快就能给出结果
+        """
+        if not self.preset_model.proxies:  # 有预设方可执行
+            return None
+        self.verifying = True
+        # 批量校验的小文件不会发出开始信号，开始前先清空上一次的结果
+        self.preset_model.updateData()
+        self.ui.totalProgressBar.setValue(0)
+        self.ui.totalProgressBar.setMaximum(len(self.preset_model.proxies) * 100)
+        self.ui.toggleStateBtn.setText("停止校验")
+        self.update_install_button()
+        self.pool.allDone.connect(self.on_preset_verify_all_done)  # 将线程池完成的事件连接上
+        # 按需逐个创建校验任务（正式执行校验），不会一次性创建全部任务
+        proxies = self.preset_model.proxies
+        # 监视模式下仍在校验的行不重复提交，完成后再重新校验
+        busy = set(self.queued_rows)
+        self.deferred_rows |= busy
+        self.queued_rows.update(range(len(proxies)))
+        self.pool.submit(
+            ((row, proxy.filename, proxy.data_md5, proxy.data_size) for row, proxy in enumerate(proxies) if row not in busy),
+            install=install, follow=self.ui.followModeCheck.isChecked())
 
     def on_preset_verify_beginning(self, row):
         """业务逻辑：单条预设开始校验时初始化部分数据，比如状态、本地 MD5 等"""
@@ -132,6 +216,28 @@ class MainWindow(QtWidgets.QMainWindow):
         start_index = self.preset_model.index(row, 0)
         end_index = self.preset_model.index(row, self.preset_model.columnCount() - 1)
         self.preset_model.dataChanged.emit(start_index, end_index)  # 更新对应行
+        self.queued_rows.discard(row)
+        self.submit_deferred_rows([(row, result)])
+
+    def on_preset_batch_finished(self, results, spilled):
+        """
+        业务逻辑：一批小文件校验完成后调用，批量更新这些行后只刷新一次表格和总进度
+        spilled 中实际不是小文件的预设由线程池单独校验，之后会收到各自的开始/完成信号
+        """
+        if not results:
+            return None
+        for row, result, local_md5, progress in results:
+            proxy = self.preset_model.proxies[row]
+            proxy.state = result
+            proxy.local_md5 = local_md5
+            proxy.progress = progress
+        rows = [row for row, _, _, _ in results]
+        start_index = self.preset_model.index(min(rows), 0)
+        end_index = self.preset_model.index(max(rows), self.preset_model.columnCount() - 1)
+        self.preset_model.dataChanged.emit(start_index, end_index)  # 更新这一批所在的行
+        self.update_verify_total_progress()
+        self.queued_rows.difference_update(rows)
+        self.submit_deferred_rows([(row, result) for row, result, _, _ in results])
 
     def update_verify_total_progress(self):
         """业务逻辑：更新总进度，在 on_preset_verify_progress 方法中执行"""
@@ -141,10 +247,11 @@ class MainWindow(QtWidgets.QMainWindow):
     def on_preset_verify_all_done(self):
         """业务逻辑：所有预设校验完成后执行的任务"""
         self.pool.allDone.disconnect(self.on_preset_verify_all_done)  # 将线程池完成的事件断开
-        self.workers = []  # 重置工作任务列表，方便可以二次校验
+        self.verifying = False  # 重置校验状态，方便可以二次校验
         self.ui.toggleStateBtn.setText("开始校验")  # 修改按钮为开始校验
+        self.update_install_button()
         total_count = self.preset_model.rowCount()  # 获取检验数量
-        success_count = sum(p.state == 1 for p in self.preset_model.proxies)  # 获取通过数量
+        success_count = sum(p.state in (1, 4) for p in self.preset_model.proxies)  # 获取通过数量（含安装完成）
         if not self.pool.errors:  # 保证没有统计到的异常，触发正常弹窗
             if total_count == success_count:  # 分支：检验和通过数量相同，则表示全部通过
                 QtWidgets.QMessageBox.information(
@@ -79,6 +79,27 @@ class Ui_MainWindow(object):
 
         self.horizontalLayout.addItem(self.horizontalSpacer)
 
+        self.followModeCheck = QCheckBox(self.centralwidget)
+        self.followModeCheck.setObjectName(u"followModeCheck")
+
+        self.horizontalLayout.addWidget(self.followModeCheck)
+
+        self.watchModeCheck = QCheckBox(self.centralwidget)
+        self.watchModeCheck.setObjectName(u"watchModeCheck")
+
+        self.horizontalLayout.addWidget(self.watchModeCheck)
+
+        self.backgroundModeCheck = QCheckBox(self.centralwidget)
+        self.backgroundModeCheck.setObjectName(u"backgroundModeCheck")
+
+        self.horizontalLayout.addWidget(self.backgroundModeCheck)
+
+        self.installBtn = QPushButton(self.centralwidget)
+        self.installBtn.setObjectName(u"installBtn")
+        self.installBtn.setMinimumSize(QSize(99, 30))
+
+        self.horizontalLayout.addWidget(self.installBtn)
+
         self.toggleStateBtn = QPushButton(self.centralwidget)
         self.toggleStateBtn.setObjectName(u"toggleStateBtn")
         self.toggleStateBtn.setMinimumSize(QSize(99, 30))
@@ -99,6 +120,10 @@ class Ui_MainWindow(object):
         MainWindow.setWindowTitle(QCoreApplication.translate("MainWindow", u"\u6e38\u620f\u4ed3\u9f20 (\u6587\u4ef6\u5b8c\u6574\u6027\u6821\u9a8c)", None))
         self.bannerLogo.setText(QCoreApplication.translate("MainWindow", u"Banner Logo \u672a\u8bbe\u7f6e", None))
         self.bottomHint.setText(QCoreApplication.translate("MainWindow", u"\u8fd9\u91cc\u662f\u5e95\u90e8\u63d0\u793a", None))
+        self.followModeCheck.setText(QCoreApplication.translate("MainWindow", u"\u8ddf\u968f\u4e0b\u8f7d\u4e2d\u7684\u6587\u4ef6", None))
+        self.watchModeCheck.setText(QCoreApplication.translate("MainWindow", u"\u76d1\u89c6\u6587\u4ef6\u53d8\u5316", None))
+        self.backgroundModeCheck.setText(QCoreApplication.translate("MainWindow", u"\u540e\u53f0\u6821\u9a8c\uff08\u9650\u901f\uff09", None))
+        self.installBtn.setText(QCoreApplication.translate("MainWindow", u"\u6821\u9a8c\u5e76\u5b89\u88c5", None))
         self.toggleStateBtn.setText(QCoreApplication.translate("MainWindow", u"\u5f00\u59cb\u6821\u9a8c", None))
     # retranslateUi
 
@@ -0,0 +1,76 @@
+"""
+基准测试：小文件逐个校验 vs 合并为批量任务校验（BatchMD5Worker）
+
+在项目文件夹中运行：
+    python benchmarks/batching.py [--count 50000] [--size 16]
+
+两种方式都走 MD5WorkerPool.submit，区别只在 batch_small_files 开关，
+并且像 MainWindow 一样在主线程中处理每个信号，统计每秒校验的文件数量
+"""
+import os
+import sys
+import time
+import hashlib
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PySide2 import QtCore  # noqa: E402
+from app.main_window.task import MD5WorkerPool  # noqa: E402
+
+
+def create_files(directory, count, size):
+    """生成 count 个 size kb 的小文件，返回预设列表 (row, filepath, data_md5)"""
+    presets = []
+    for row in range(count):
+        data = os.urandom(size * 1024)
+        filepath = Path(directory) / f'{row:06d}.bin'
+        filepath.write_bytes(data)
+        presets.append((row, str(filepath), hashlib.md5(data).hexdigest()))
+    return presets
+
+
+def run(presets, batch_small_files):
+    """校验全部预设，返回 (耗时, 通过数量)"""
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication(sys.argv)
+    pool = MD5WorkerPool()
+    pool.setMaxThreadCount(8)
+    pool.batch_small_files = batch_small_files
+    states = {}
+
+    def on_finished(row, state, _):
+        states[row] = state
+
+    def on_batch_finished(results, _):
+        for row, state, _, _ in results:
+            states[row] = state
+
+    pool.signals.beginning.connect(lambda *_: None)
+    pool.signals.progress.connect(lambda *_: None)
+    pool.signals.finished.connect(on_finished)
+    pool.signals.batchFinished.connect(on_batch_finished)
+    pool.allDone.connect(app.quit)
+
+    start = time.perf_counter()
+    pool.submit(iter(presets))
+    app.exec_()
+    return time.perf_counter() - start, sum(state == 1 for state in states.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='小文件批量校验基准测试')
+    parser.add_argument('--count', type=int, default=50000, help='文件数量')
+    parser.add_argument('--size', type=int, default=16, help='单个文件大小（kb）')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        presets = create_files(directory, args.count, args.size)
+        for name, batch_small_files in (('per-file', False), ('batched', True)):
+            elapsed, passed = run(presets, batch_small_files)
+            print(f'{name:>8}: {len(presets) / elapsed:.0f} 个文件/秒，耗时 {elapsed:.2f}s，通过 {passed}/{len(presets)}')
+
+
+if __name__ == '__main__':
+    main()
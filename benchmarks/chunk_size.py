@@ -0,0 +1,95 @@
+"""
+基准测试：自适应块大小（ChunkSizer） vs 原先的随机块大小
+
+在项目文件夹中运行：
+    python benchmarks/chunk_size.py [--size 512] [--rounds 3] [--dir 临时文件所在目录]
+
+注意：第二次及之后读取同一文件时会命中系统缓存，
+想测试真实磁盘速度可以使用更大的 --size（超过内存）或者每轮之间手动清空缓存
+"""
+import os
+import sys
+import time
+import random
+import hashlib
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.bases.utils import ChunkSizer  # noqa: E402
+
+
+def random_policy(filepath):
+    """原先 MD5Worker 的策略：32kb~128kb，超过 1GB 的文件 256kb~1mb"""
+    chunk_size = random.randint(32, 128) * 1024
+    if filepath.stat().st_size >= 1024 * 1024 * 1024:
+        chunk_size = random.randint(256, 1024) * 1024
+    md5 = hashlib.md5()
+    with filepath.open('rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+def adaptive_policy(filepath):
+    """现在 MD5Worker 的策略：按设备校准，读取时根据耗时调整"""
+    sizer = ChunkSizer(filepath)
+    chunk_size = sizer.chunk_size
+    md5 = hashlib.md5()
+    with filepath.open('rb') as f:
+        while True:
+            start = time.perf_counter()
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            chunk_size = sizer.observe(time.perf_counter() - start)
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+def measure(policy, filepath, rounds):
+    """返回每一轮的速度（MB/s）"""
+    total_size = filepath.stat().st_size
+    speeds = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        policy(filepath)
+        elapsed = time.perf_counter() - start
+        speeds.append(total_size / elapsed / (1024 * 1024))
+    return speeds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='块大小策略基准测试')
+    parser.add_argument('--size', type=int, default=512, help='测试文件大小（MB）')
+    parser.add_argument('--rounds', type=int, default=3, help='每种策略运行轮数')
+    parser.add_argument('--dir', type=str, default=None, help='测试文件所在目录（决定测试哪个磁盘）')
+    args = parser.parse_args()
+
+    fd, name = tempfile.mkstemp(suffix='.bin', dir=args.dir)
+    filepath = Path(name)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for _ in range(args.size):
+                f.write(os.urandom(1024 * 1024))
+
+        # 校准只发生一次，单独计时，不计入各轮速度
+        start = time.perf_counter()
+        baseline = ChunkSizer.calibrate(filepath)
+        print(f'校准耗时：{time.perf_counter() - start:.3f}s，校准块大小：{baseline // 1024}kb')
+
+        for name_, policy in (('random', random_policy), ('adaptive', adaptive_policy)):
+            speeds = measure(policy, filepath, args.rounds)
+            detail = ', '.join(f'{s:.1f}' for s in speeds)
+            print(f'{name_:>8}: 平均 {sum(speeds) / len(speeds):.1f} MB/s（{detail}）')
+    finally:
+        filepath.unlink()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""
+基准测试：一次性创建全部 MD5Worker（旧方式） vs 线程池惰性提交（MD5WorkerPool.submit）
+
+在项目文件夹中运行：
+    python benchmarks/submission.py [--count 20000] [--size 4]
+
+旧方式使用与旧版相同的线程池（EagerPool：每个任务连接 finished、error 两个信号，计数归零时发出 allDone），
+新方式使用 MD5WorkerPool。分别在独立的子进程中运行两种方式，统计：
+    首个哈希耗时：点击开始到第一个文件校验完成
+    总耗时：点击开始到全部校验完成
+    峰值内存：Python 对象峰值（tracemalloc），以及进程峰值常驻内存（仅 Linux/macOS）
+"""
+import os
+import sys
+import time
+import hashlib
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PySide2 import QtCore  # noqa: E402
+from app.main_window.task import MD5Worker, MD5WorkerPool  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows 下没有 resource 模块
+    resource = None
+
+
+def create_files(directory, count, size):
+    """生成 count 个 size kb 的小文件，返回预设列表 (filepath, data_md5)"""
+    presets = []
+    for i in range(count):
+        data = os.urandom(size * 1024)
+        filepath = Path(directory) / f'{i:06d}.bin'
+        filepath.write_bytes(data)
+        presets.append((str(filepath), hashlib.md5(data).hexdigest()))
+    return presets
+
+
+class EagerPool(QtCore.QThreadPool):
+    """旧版 MD5WorkerPool 的原样复制，作为对照组"""
+    allDone = QtCore.Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent=parent)
+        self.active_tasks = 0
+        self.active_tasks_mutex = QtCore.QMutex()
+        self.errors = []
+        self.collect_error_mutex = QtCore.QMutex()
+
+    def start(self, runnable: MD5Worker, priority=0):
+        self.active_tasks_mutex.lock()
+        self.active_tasks += 1
+        self.active_tasks_mutex.unlock()
+
+        runnable.signals.finished.connect(self._task_finished)
+        runnable.signals.error.connect(self._task_occur_error)
+        super().start(runnable, priority)
+
+    def _task_finished(self):
+        self.active_tasks_mutex.lock()
+        self.active_tasks -= 1
+        if self.active_tasks == 0:
+            self.allDone.emit()
+        self.active_tasks_mutex.unlock()
+
+    def _task_occur_error(self, row, exception):
+        self.collect_error_mutex.lock()
+        self.errors.append((row, exception))
+        self.collect_error_mutex.unlock()
+
+
+class Receiver(QtCore.QObject):
+    """代替 MainWindow 接收信号，两种方式都连接到同一个对象的方法上，与界面的连接方式一致"""
+
+    def __init__(self, timings):
+        super().__init__()
+        self.timings = timings
+
+    def on_beginning(self, row):
+        pass
+
+    def on_progress(self, row, progress):
+        pass
+
+    def on_finished(self, row, state, md5):
+        self.timings.setdefault('first', time.perf_counter())
+
+
+def run_mode(mode, presets):
+    """在当前进程中按 mode 校验全部预设，返回 (首个哈希耗时, 总耗时)"""
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication(sys.argv)
+    pool = EagerPool() if mode == 'eager' else MD5WorkerPool()
+    pool.setMaxThreadCount(8)
+    if mode != 'eager':
+        pool.batch_small_files = False  # 只比较提交方式，每条预设都是单独的 MD5Worker（批量的收益见 batching.py）
+    timings = {}
+    receiver = Receiver(timings)
+    workers = []
+
+    def on_all_done():
+        timings['done'] = time.perf_counter()
+        app.quit()
+
+    pool.allDone.connect(on_all_done)
+    start = time.perf_counter()
+    if mode == 'eager':
+        # 与旧版 on_toggle_state_click 相同：每条预设一个任务、一个信号对象、三次信号连接
+        for row, (filepath, data_md5) in enumerate(presets):
+            worker = MD5Worker(row, filepath, data_md5)
+            worker.signals.beginning.connect(receiver.on_beginning)
+            worker.signals.progress.connect(receiver.on_progress)
+            worker.signals.finished.connect(receiver.on_finished)
+            workers.append(worker)
+        for worker in workers:
+            pool.start(worker)
+    else:
+        pool.signals.beginning.connect(receiver.on_beginning)
+        pool.signals.progress.connect(receiver.on_progress)
+        pool.signals.finished.connect(receiver.on_finished)
+        pool.submit((row, f, m) for row, (f, m) in enumerate(presets))
+    app.exec_()
+    return timings['first'] - start, timings['done'] - start
+
+
+def child(mode, manifest):
+    """子进程入口：读取预设清单，运行并打印结果"""
+    presets = [line.split('\t') for line in Path(manifest).read_text(encoding='utf-8').splitlines()]
+    tracemalloc.start()
+    first, total = run_mode(mode, presets)
+    _, peak = tracemalloc.get_traced_memory()
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else float('nan')
+    print(f'{mode:>5}: 首个哈希 {first * 1000:.1f}ms，总耗时 {total:.2f}s，'
+          f'Python 峰值 {peak / 1024 / 1024:.1f}MB，进程峰值 {rss:.1f}MB')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='任务提交方式基准测试')
+    parser.add_argument('--count', type=int, default=20000, help='文件数量')
+    parser.add_argument('--size', type=int, default=4, help='单个文件大小（kb）')
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'MANIFEST'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return None
+
+    with tempfile.TemporaryDirectory() as directory:
+        presets = create_files(directory, args.count, args.size)
+        manifest = Path(directory) / 'manifest.tsv'
+        manifest.write_text('\n'.join('\t'.join(p) for p in presets), encoding='utf-8')
+        for mode in ('eager', 'lazy'):
+            subprocess.call([sys.executable, __file__, '--child', mode, str(manifest)])
+    return None
+
+
+if __name__ == '__main__':
+    main()
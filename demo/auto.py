@@ -38,7 +38,8 @@ def create_config(directory, exclude_names):
             file_md5 = calculate_md5(filepath)
             config['presets'].append({
                 "filename": filepath.name,
-                "data_md5": file_md5
+                "data_md5": file_md5,
+                "data_size": filepath.stat().st_size
             })
     return config
 